@@ -4,9 +4,24 @@
 - Simulates DAU using simple cohort + retention logic
 - Combines DAU from multiple user sources (old + new)
 - Estimates revenue from IAP + ads for each variant
+- Runs independent scenarios, optionally in parallel worker processes
 """
 
-from dataclasses import dataclass
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from importlib.util import find_spec
+
+import numpy as np
+
+# numba is optional and slow to import, so src.kernels is only imported on the long-horizon path
+NUMBA_AVAILABLE = find_spec("numba") is not None
+
+# Horizons longer than this are dispatched to the compiled kernels
+DAU_KERNEL_MIN_DAYS = 365
+
+# Average revenue per paying user used by simulate_revenue unless overridden
+DEFAULT_ARPPU = 5.0
 
 @dataclass
 class VariantConfig:
@@ -25,37 +40,90 @@ class VariantConfig:
     ecpm: float
     ad_impressions_per_dau: float
 
-def simulate_dau(daily_installs, retention_fn):
+def simulate_dau(daily_installs, retention):
     """
     Simulate DAU for one user source
 
+    DAU on day t is the sum over past cohorts of installs[k] * retention(t - k + 1),
+    which is a causal convolution of installs with the retention curve.
+
     Parameters
     ----------
     daily_installs : list[int]
-        Installs on each day
-    retention_fn : function
-        Function that takes 'age in days since install' and returns retention fraction (0-1)
+        Installs on each day, or a 2-D array with one row per variant
+    retention : function or array-like
+        Either a function that takes 'age in days since install' and returns retention fraction (0-1),
+        or the precomputed retention per age (index 0 = install day), e.g. from retention_table.
+        For 2-D installs, a 2-D array with one retention row per variant
 
     Returns
     -------
-    list[float]
-        DAU each day
+    np.ndarray
+        DAU each day (one row per variant for 2-D installs)
     """
-    days = len(daily_installs)
-    dau = []
+    installs_arr = np.asarray(daily_installs, dtype=np.float64)
+
+    # Stacked batch: one row of installs (and retention) per variant
+    if installs_arr.ndim == 2:
+        return _simulate_dau_batch(installs_arr, retention)
 
-    for current_day in range(1, days + 1):
-        active_users = 0.0
-    
-        # Loop over all past cohorts
-        for install_day in range(1, current_day + 1):
-            installs = daily_installs[install_day - 1]
-            age = current_day - install_day + 1
-            active_users += installs * retention_fn(age)
+    days = len(installs_arr)
+    if days == 0:
+        return np.empty(0, dtype=np.float64)
 
-        dau.append(active_users)
-    
-    return dau
+    if callable(retention):
+        # Retention curve evaluated once per age (1 = install day)
+        ages = np.arange(1, days + 1)
+        retention = np.fromiter((retention(age) for age in ages), dtype=np.float64, count=days)
+    else:
+        retention = np.asarray(retention, dtype=np.float64)[:days]
+        # Ages past the end of a short curve count as 0 retention
+        if len(retention) < days:
+            retention = np.pad(retention, (0, days - len(retention)))
+
+    # Long horizons: compiled loop avoids the convolution temporaries
+    if NUMBA_AVAILABLE and days > DAU_KERNEL_MIN_DAYS:
+        from src.kernels import dau_kernel
+        return dau_kernel(installs_arr, retention)
+
+    return np.convolve(installs_arr, retention)[:days]
+
+def _simulate_dau_batch(installs_matrix, retention_matrix):
+    """
+    simulate_dau for stacked rows (one per variant)
+
+    Parameters
+    ----------
+    installs_matrix : np.ndarray (float64, shape V x T)
+        Installs on each day, one row per variant
+    retention_matrix : array-like (shape V x >=T)
+        Retention per age for each row (column 0 = install day)
+
+    Returns
+    -------
+    np.ndarray
+        DAU each day, shape V x T
+    """
+    n_rows, days = installs_matrix.shape
+    retention_matrix = np.ascontiguousarray(np.asarray(retention_matrix, dtype=np.float64)[:, :days])
+    # The compiled kernel has no bounds checks, so the shape must be right
+    if retention_matrix.shape != (n_rows, days):
+        raise ValueError(
+            f"retention must have shape ({n_rows}, >={days}) for installs of shape ({n_rows}, {days}), "
+            f"got {retention_matrix.shape}"
+        )
+
+    # Long horizons: compiled loop, rows spread across threads
+    if NUMBA_AVAILABLE and days > DAU_KERNEL_MIN_DAYS:
+        from src.kernels import dau_batch
+        out = np.empty((n_rows, days), dtype=np.float64)
+        dau_batch(np.ascontiguousarray(installs_matrix), retention_matrix, out)
+        return out
+
+    return np.stack([
+        np.convolve(installs, retention)[:days]
+        for installs, retention in zip(installs_matrix, retention_matrix)
+    ])
 
 def combine_sources(*dau_sources):
     """
@@ -64,20 +132,20 @@ def combine_sources(*dau_sources):
 
     Returns
     -------
-    list[float]
+    np.ndarray
         Total DAU each day
     """
     if not dau_sources:
-        return[]
-    
-    days = len(dau_sources[0])
-    total_dau = []
+        return np.array([], dtype=np.float64)
 
-    for day_idx in range(days):
-        day_sum = 0.0
-        for source in dau_sources:
-            day_sum += source[day_idx]
-        total_dau.append(day_sum)
+    # Accumulate into one preallocated buffer instead of stacking all sources
+    days = len(dau_sources[0])
+    total_dau = np.zeros(days, dtype=np.float64)
+    for i, source in enumerate(dau_sources):
+        # In-place add would silently broadcast a length-1 source over every day
+        if len(source) != days:
+            raise ValueError(f"dau_sources[{i}] has {len(source)} days, expected {days}")
+        total_dau += source
 
     return total_dau
 
@@ -87,7 +155,7 @@ def simulate_revenue(
         dau_total,
         sale_period=None,
         sale_boost_abs=0.0,
-        arppu=5.0,
+        arppu=DEFAULT_ARPPU,
 ):
     """
     Simulate daily revenue (IAP + ads) for one variant
@@ -109,35 +177,101 @@ def simulate_revenue(
 
     Returns
     -------
-    list[float]
+    np.ndarray
         Daily revenue values.
     """
-    assert len(daily_installs_total) == len(dau_total)
+    installs = np.asarray(daily_installs_total, dtype=np.float64)
+    dau = np.asarray(dau_total, dtype=np.float64)
+    assert len(installs) == len(dau)
 
-    daily_revenue = []
+    purchase_rate = np.full(len(dau), variant.base_purchase_rate)
 
-    for day_idx in range(len(dau_total)):
-        day_number = day_idx + 1
+    # Applying sale boost if in sale window (days are 1-indexed, both ends inclusive)
+    if sale_period is not None:
+        start, end = sale_period
+        purchase_rate[max(start - 1, 0):end] += sale_boost_abs
 
-        purchase_rate = variant.base_purchase_rate
+    # IAP revenue, computed into the purchase_rate buffer
+    revenue = purchase_rate
+    revenue *= installs
+    revenue *= arppu
 
-        # Applying sale boost if in sale window
-        if sale_period is not None:
-            start, end = sale_period
-            if start <= day_number <= end:
-                purchase_rate += sale_boost_abs
+    # Ad revenue: impressions * eCPM / 1000, added in place
+    ad_revenue_per_dau = variant.ad_impressions_per_dau * variant.ecpm / 1000.0
+    revenue += dau * ad_revenue_per_dau
 
-        installs = daily_installs_total[day_idx]
-        dau = dau_total[day_idx]
+    return revenue
 
-        # IAP revenue
-        iap_revenue = installs * purchase_rate * arppu
+@dataclass
+class ScenarioConfig:
+    """
+    One independent simulation: a variant plus one or more user sources
+
+    installs_by_source : list[list[int]]
+        Installs per day for each user source (all the same length)
+    retention_by_source : list
+        Retention for each source, same order as installs_by_source
+        (function or per-age array, see simulate_dau)
+    sale_period : tuple (start_day, end_day)
+        Passed to simulate_revenue, None for no sale.
+    """
+    name: str
+    variant: VariantConfig
+    installs_by_source: list = field(default_factory=list)
+    retention_by_source: list = field(default_factory=list)
+    sale_period: tuple | None = None
+    sale_boost_abs: float = 0.0
+
+def run_scenario(scenario):
+    """
+    Simulate DAU for every source of a scenario, then its daily revenue
+
+    Returns
+    -------
+    tuple (np.ndarray, np.ndarray)
+        Total DAU each day and daily revenue.
+    """
+    dau_sources = [
+        simulate_dau(installs, retention)
+        for installs, retention in zip(scenario.installs_by_source, scenario.retention_by_source)
+    ]
+    dau_total = combine_sources(*dau_sources)
+    installs_total = combine_sources(*[np.asarray(i, dtype=np.float64) for i in scenario.installs_by_source])
+
+    revenue = simulate_revenue(
+        scenario.variant,
+        daily_installs_total=installs_total,
+        dau_total=dau_total,
+        sale_period=scenario.sale_period,
+        sale_boost_abs=scenario.sale_boost_abs,
+    )
+    return dau_total, revenue
+
+def run_scenarios(scenarios, max_workers=1):
+    """
+    Run independent scenarios, serially by default
 
-        # Ad revenue
-        ad_impressions = dau * variant.ad_impressions_per_dau
-        ad_revenue = (ad_impressions * variant.ecpm) / 1000.0
+    Each scenario is only a few convolutions, so starting worker processes
+    costs far more than it saves. Pass max_workers > 1 (or None for one per
+    core) to use a process pool for large sweeps. Workers pull scenarios one at
+    a time from the pool's queue, so a slow scenario does not hold back the
+    others. Results come back in input order.
+
+    Workers start from a fresh forkserver (or spawn) process rather than a fork of the
+    caller, so they never inherit numba threads started by dau_batch (a forked
+    copy of a running threading layer hangs on exit). Scripts that use the
+    pool therefore need the usual `if __name__ == "__main__":` guard.
+
+    Returns
+    -------
+    list[tuple (np.ndarray, np.ndarray)]
+        run_scenario output for each scenario.
+    """
+    if max_workers == 1 or len(scenarios) <= 1:
+        return [run_scenario(scenario) for scenario in scenarios]
 
-        total = iap_revenue + ad_revenue
-        daily_revenue.append(total)
-    
-    return daily_revenue
\ No newline at end of file
+    # forkserver is POSIX-only; Windows falls back to spawn (also a fresh interpreter)
+    start_method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+    mp_context = multiprocessing.get_context(start_method)
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=mp_context) as ex:
+        return list(ex.map(run_scenario, scenarios, chunksize=1))
@@ -0,0 +1,60 @@
+# Task 1 - Compiled kernels
+
+"""
+- Numba-compiled loops for long simulation horizons
+- Requires numba; src.ab_test_task_1 only imports this module when numba is installed
+"""
+
+import numpy as np
+from numba import njit, prange
+
+@njit(cache=True, fastmath=True)
+def dau_kernel(installs, retention):
+    """
+    Triangular accumulation of cohorts: out[t] = sum_{k<=t} installs[k] * retention[t-k]
+
+    Parameters
+    ----------
+    installs : np.ndarray (float64)
+        Installs on each day
+    retention : np.ndarray (float64)
+        Retention per age (index 0 = install day), at least as long as installs
+
+    Returns
+    -------
+    np.ndarray
+        DAU each day
+    """
+    days = installs.shape[0]
+    out = np.empty(days, dtype=np.float64)
+
+    for t in range(days):
+        acc = 0.0
+        for k in range(t + 1):
+            acc += installs[k] * retention[t - k]
+        out[t] = acc
+
+    return out
+
+@njit(cache=True, parallel=True, fastmath=True)
+def dau_batch(installs_matrix, retention_matrix, out):
+    """
+    dau_kernel for several independent rows (e.g. variants) at once, one thread per row
+
+    Parameters
+    ----------
+    installs_matrix : np.ndarray (float64, shape V x T)
+        Installs on each day, one row per variant
+    retention_matrix : np.ndarray (float64, shape V x >=T)
+        Retention per age for each row (column 0 = install day)
+    out : np.ndarray (float64, shape V x T)
+        Filled with DAU each day for each row
+    """
+    n_rows, days = installs_matrix.shape
+
+    for v in prange(n_rows):
+        for t in range(days):
+            acc = 0.0
+            for k in range(t + 1):
+                acc += installs_matrix[v, k] * retention_matrix[v, t - k]
+            out[v, t] = acc
@@ -1,6 +1,9 @@
 # Task 1 - Retention Logic
 
 import math
+from functools import lru_cache
+
+import numpy as np
 
 def linear_retention(day, points):
     """
@@ -46,8 +49,70 @@ def linear_retention(day, points):
 
     return r1 + slope * (day - prev_day)
 
+def retention_table(points, max_day):
+    """
+    Returns retention for every age from 1 to max_day in one vectorized pass.
+    Same curve as linear_retention: linear between known points, linear
+    extrapolation (floored at 0) after the last one.
+
+    Results are memoized per (points, max_day), so repeated scenarios on the
+    same curve share one read-only array.
+
+    Parameters
+    ----------
+    points : dict
+        Known retention points as {day: retention_fraction}.
+    max_day : int
+        Last age (in days since install) to evaluate.
+
+    Returns
+    -------
+    np.ndarray
+        Read-only retention fraction for ages 1..max_day (index 0 = install day).
+    """
+    return _retention_array(tuple(sorted(points.items())), max_day)
+
+@lru_cache(maxsize=32)
+def _retention_array(points_items, max_day):
+    xp = np.array([d for d, _ in points_items], dtype=np.float64)
+    fp = np.array([r for _, r in points_items], dtype=np.float64)
+
+    ages = np.arange(1, max_day + 1)
+    vals = np.interp(ages, xp, fp)
+
+    # If age is after the last known point, extrapolate linearly
+    mask = ages > xp[-1]
+    if mask.any():
+        slope = (fp[-1] - fp[-2]) / (xp[-1] - xp[-2])
+        vals[mask] = np.maximum(0.0, fp[-1] + slope * (ages[mask] - xp[-1]))
+
+    # All users are retained on first day of install
+    vals[ages <= 1] = 1.0
+
+    # Shared between callers through the cache
+    vals.setflags(write=False)
+    return vals
+
+# New user source retention curves: scale * e^(-rate * (x - 1))
+
+def _exp_decay_table(scale, rate, max_day):
+    ages = np.arange(1, max_day + 1)
+    return scale * np.exp(-rate * (ages - 1))
+
+# Scalar lookups below index into these instead of calling math.exp each time
+CACHED_MAX_DAY = 365
+
 # New user source variant A comes in
 
+def make_retention_new_variant_a(max_day):
+    """
+    New user source retention for Variant A for ages 1..max_day (index 0 = install day):
+    Retention = 0.58 * e^(-0.12 * (x - 1))
+    """
+    return _exp_decay_table(0.58, 0.12, max_day)
+
+_retention_new_a = make_retention_new_variant_a(CACHED_MAX_DAY)
+
 def retention_new_variant_a(day):
     """
     New user source retention for Variant A:
@@ -55,10 +120,22 @@ def retention_new_variant_a(day):
     """
     if day < 1:
         return 0.0
+    # Table lookup only for whole-day ages; fractional ages use the closed form
+    if isinstance(day, (int, np.integer)) and day <= CACHED_MAX_DAY:
+        return float(_retention_new_a[day - 1])
     return 0.58 * math.exp(-0.12 * (day - 1))
 
 # New user source variant B comes in
 
+def make_retention_new_variant_b(max_day):
+    """
+    New user source retention for Variant B for ages 1..max_day (index 0 = install day):
+    Retention = 0.52 * e^(-0.10 * (x - 1))
+    """
+    return _exp_decay_table(0.52, 0.10, max_day)
+
+_retention_new_b = make_retention_new_variant_b(CACHED_MAX_DAY)
+
 def retention_new_variant_b(day):
     """
     New user source retention for Variant B:
@@ -66,4 +143,7 @@ def retention_new_variant_b(day):
     """
     if day < 1:
         return 0.0
+    # Table lookup only for whole-day ages; fractional ages use the closed form
+    if isinstance(day, (int, np.integer)) and day <= CACHED_MAX_DAY:
+        return float(_retention_new_b[day - 1])
     return 0.52 * math.exp(-0.10 * (day - 1))
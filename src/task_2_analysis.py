@@ -7,7 +7,7 @@ Columns:
 user_id, event_date, platform, install_date, country, total_session_count, total_session_duration, match_start_count, match_end_count, victory_count, defeat_count, server_connection_error, iap_revenue, ad_revenue
 
 How am I going to analyze the data?
-- Load & process all the data from CSV.GZ files in /data
+- Load & process all the data from CSV.GZ files in /data (with polars, cached as Parquet)
 - Create derived metrics from the original data to help with the analysis
 - Run analyses for "Platform & country performance", "Engagement vs monetization", "Frustration signals (error, defeats), "Retention by install cohort"
 - Create plots for these analyses and save them in /plots
@@ -15,52 +15,122 @@ How am I going to analyze the data?
 
 from pathlib import Path
 import pandas as pd
-import numpy as np
+import polars as pl
 import matplotlib.pyplot as plt
 
 plt.style.use("Solarize_Light2")
 
 data_dir = Path("data")
 
+# Typed Parquet copy of the raw files, rebuilt whenever a .csv.gz is newer
+cache_name = "cache.parquet"
+
+count_cols = [
+    "total_session_count", "match_start_count", "match_end_count",
+    "victory_count", "defeat_count", "server_connection_error",
+]
+revenue_cols = ["iap_revenue", "ad_revenue"]
+
+# Parse straight into compact dtypes (dates are detected by try_parse_dates)
+csv_schema = {
+    "platform": pl.Categorical,
+    "country": pl.Categorical,
+    **{c: pl.Int32 for c in count_cols},
+    **{c: pl.Float32 for c in revenue_cols},
+}
+
+# Columns the analyses below actually read (match_start/end_count are unused)
+analysis_columns = [
+    "user_id", "event_date", "platform", "install_date", "country",
+    "total_session_count", "total_session_duration",
+    "victory_count", "defeat_count", "server_connection_error",
+    "iap_revenue", "ad_revenue",
+]
+
+def _cache_path(sample_frac: float | None) -> Path:
+    if sample_frac is None:
+        return data_dir / cache_name
+    return data_dir / f"cache_frac{sample_frac}.parquet"
+
+def _cache_is_fresh(cache: Path, files: list[Path], columns: list[str] | None) -> bool:
+    if not cache.exists():
+        return False
+    cache_mtime = cache.stat().st_mtime
+    if not all(f.stat().st_mtime <= cache_mtime for f in files):
+        return False
+    # A cache built from fewer columns can't serve a wider request
+    cached_columns = set(pl.read_parquet_schema(cache))
+    if columns is None:
+        return cached_columns >= set(pl.scan_csv(files[0]).collect_schema().names())
+    return cached_columns >= set(columns)
+
 # Load and concatenate all .csv.gz files from /data
-def load_all_data(sample_frac: float | None = None) -> pd.DataFrame:
+def load_all_data(sample_frac: float | None = None, columns: list[str] | None = None) -> pl.LazyFrame:
+    """
+    First run scans the .csv.gz files with polars (only the requested columns,
+    already typed) and writes a Parquet cache under /data; later runs scan the
+    cache lazily.
+    """
 
     files = sorted(data_dir.glob("*.csv.gz"))
     if not files:
         raise FileNotFoundError(f"No .csv.gz files found in /data")
 
+    cache = _cache_path(sample_frac)
+    if _cache_is_fresh(cache, files, columns):
+        print(f"Loading {cache.name} ...")
+        lf = pl.scan_parquet(cache)
+        return lf if columns is None else lf.select(columns)
+
     dfs = []
     for f in files:
         print(f"Loading {f.name} ...")
-        df_part = pd.read_csv(f)
+        lf_part = pl.scan_csv(f, schema_overrides=csv_schema, try_parse_dates=True)
+        if columns is not None:
+            lf_part = lf_part.select(columns)
+        df_part = lf_part.collect()
         if sample_frac is not None:
-            df_part = df_part.sample(frac=sample_frac, random_state=42)
+            df_part = df_part.sample(fraction=sample_frac, seed=42)
         dfs.append(df_part)
 
-    df = pd.concat(dfs, ignore_index=True)
-    print(f"Loaded {len(df):,} rows from {len(files)} files.")
-    return df
-
-def preprocess(df: pd.DataFrame) -> pd.DataFrame:
-    # Clean the data + create derived metrics: convert_date, days_since_install, total_revenue, is_payer, win_rate
-    df = df.copy()
+    df = pl.concat(dfs)
+    print(f"Loaded {df.height:,} rows from {len(files)} files.")
 
-    # Dates
-    df["event_date"] = pd.to_datetime(df["event_date"])
-    df["install_date"] = pd.to_datetime(df["install_date"])
+    df.write_parquet(cache)
+    print(f"Cached to {cache.name}.")
+    return df.lazy()
 
-    # Days since install
-    df["days_since_install"] = (df["event_date"] - df["install_date"]).dt.days
+def preprocess(lf: pl.LazyFrame) -> pl.LazyFrame:
+    # Clean the data + create derived metrics: convert_date, days_since_install, total_revenue, is_payer, has_error, win_rate
+    schema = lf.collect_schema()
 
-    # Total Revenue + is_payer
-    df["total_revenue"] = df["iap_revenue"] + df["ad_revenue"]
-    df["is_payer"] = df["total_revenue"] > 0
+    # Dates (already parsed when the CSV reader recognised them)
+    lf = lf.with_columns(
+        pl.col(c).str.to_datetime() if schema[c] == pl.String else pl.col(c)
+        for c in ("event_date", "install_date")
+    )
 
-    # Win Rate
-    fights = df["victory_count"] + df["defeat_count"]
-    df["win_rate"] = df["victory_count"] / fights.replace({0: np.nan})
+    # Smaller dtypes: categorical keys, 32-bit counts and revenues
+    lf = lf.with_columns(
+        pl.col("platform", "country").cast(pl.Categorical),
+        pl.col(*[c for c in count_cols if c in schema]).cast(pl.Int32),
+        pl.col(*revenue_cols).cast(pl.Float32),
+    )
 
-    return df
+    fights = pl.col("victory_count") + pl.col("defeat_count")
+    return lf.with_columns(
+        # Days since install
+        days_since_install = (pl.col("event_date") - pl.col("install_date")).dt.total_days(),
+        # Total Revenue in Float64 so the sums/means over millions of rows don't drift (inputs stay Float32)
+        total_revenue = pl.col("iap_revenue").cast(pl.Float64) + pl.col("ad_revenue").cast(pl.Float64),
+        # Error flag
+        has_error = pl.col("server_connection_error") > 0,
+        # Win Rate (null on days without fights)
+        win_rate = pl.when(fights > 0).then(pl.col("victory_count") / fights),
+    ).with_columns(
+        # is_payer
+        is_payer = pl.col("total_revenue") > 0,
+    )
 
 def annotate_line_points(ax, xs, ys, pct=False):
      for x, y in zip(xs, ys):
@@ -75,64 +145,68 @@ def annotate_line_points(ax, xs, ys, pct=False):
                bbox = dict(alpha = 0.55, boxstyle = "round, pad=0.2")
           )
 
-def annotate_bars_vertical(ax, pct: bool = False):
-    for patch in ax.patches:
-        value = patch.get_height()
-        label = f"{value*100:.1f}%" if pct else f"{value:.2f}"
+def _bar_labels(values, pct: bool):
+    return [f"{v*100:.1f}%" if pct else f"{v:.2f}" for v in values]
 
-        x = patch.get_x() + patch.get_width() / 2
-        y = value
-
-        ax.text(
-            x,
-            y,
-            label,
-            ha="center",
-            va="bottom",
-            fontsize=8,
-            bbox=dict(alpha=0.55, boxstyle="round,pad=0.2")
-        )
+def annotate_bars_vertical(ax, pct: bool = False):
+    container = ax.containers[0]
+    ax.bar_label(
+        container,
+        labels=_bar_labels(container.datavalues, pct),
+        fontsize=8,
+        bbox=dict(alpha=0.55, boxstyle="round,pad=0.2")
+    )
 
 
 def annotate_bars_horizontal(ax, pct: bool = False):
-    for patch in ax.patches:
-        value = patch.get_width()
-        label = f"{value*100:.1f}%" if pct else f"{value:.2f}"
-        x = value
-        y = patch.get_y() + patch.get_height() / 2
-
-        ax.text(
-            x + (abs(value) * 0.02),
-            y,
-            label,
-            ha="left",
-            va="center",
-            fontsize=8,
-            bbox=dict(alpha=0.55, boxstyle="round,pad=0.2")
-        )
+    container = ax.containers[0]
+    ax.bar_label(
+        container,
+        labels=_bar_labels(container.datavalues, pct),
+        padding=3,
+        fontsize=8,
+        bbox=dict(alpha=0.55, boxstyle="round,pad=0.2")
+    )
 
 # Analysis Functions
+# Each takes the preprocessed pl.LazyFrame, aggregates in polars and only
+# converts the small result tables to pandas for printing and plotting.
+# polars keeps null group keys, so each group_by drops them first (as pandas groupby did).
 
-def overview(df: pd.DataFrame) -> None:
+def overview(lf: pl.LazyFrame) -> None:
     # Basic data overview
     print("\n=== Overview ===")
-    n_rows = len(df)
-    n_users = df["user_id"].nunique()
-    date_min = df["event_date"].min()
-    date_max = df["event_date"].max()
-
-    print(f"Rows: {n_rows:,}")
-    print(f"Unique users: {n_users:,}")
-    print(f"Event date range: {date_min.date()} -> {date_max.date()}")
-    print(f"Platforms: {df['platform'].unique()}")
+    stats = lf.select(
+        n_rows = pl.len(),
+        n_users = pl.col("user_id").n_unique(),
+        date_min = pl.col("event_date").min(),
+        date_max = pl.col("event_date").max(),
+        dsi_min = pl.col("days_since_install").min(),
+        dsi_median = pl.col("days_since_install").median(),
+        dsi_max = pl.col("days_since_install").max(),
+    ).collect().row(0, named=True)
+    platforms = lf.select(pl.col("platform").unique().sort()).collect().to_series().to_list()
+    countries = (
+        lf.drop_nulls("country").group_by("country").agg(count = pl.len())
+        .sort("count", descending=True)
+        .head(10)
+        .collect()
+        .to_pandas()
+        .set_index("country")["count"]
+    )
+
+    print(f"Rows: {stats['n_rows']:,}")
+    print(f"Unique users: {stats['n_users']:,}")
+    print(f"Event date range: {pd.Timestamp(stats['date_min']).date()} -> {pd.Timestamp(stats['date_max']).date()}")
+    print(f"Platforms: {platforms}")
     print(f"Countries (top 10):") 
-    print(df["country"].value_counts().head(10))
+    print(countries)
     print("\nDays since install (min/median/max):",
-          int(df["days_since_install"].min()),
-          int(df["days_since_install"].median()),
-          int(df["days_since_install"].max()))
+          int(stats["dsi_min"]),
+          int(stats["dsi_median"]),
+          int(stats["dsi_max"]))
     
-def platform_country_performance(df: pd.DataFrame) -> None:
+def platform_country_performance(lf: pl.LazyFrame) -> None:
     """
     Compare platforms and top countries on users/revenue
     
@@ -140,14 +214,19 @@ def platform_country_performance(df: pd.DataFrame) -> None:
 
     print("\n=== Platform Performance ===")
     plat = (
-        df.groupby("platform").agg(
-            users = ("user_id", "nunique"),
-            total_rev = ("total_revenue", "sum"),
-            payers = ("is_payer", "sum")
+        lf.drop_nulls("platform").group_by("platform").agg(
+            users = pl.col("user_id").n_unique(),
+            total_rev = pl.col("total_revenue").sum(),
+            payers = pl.col("is_payer").sum()
         )
+        .with_columns(
+            ARPU = pl.col("total_rev") / pl.col("users"),
+            **{"Payer share": pl.col("payers") / pl.col("users")}
+        )
+        .collect()
+        .to_pandas()
+        .set_index("platform")
     )
-    plat["ARPU"] = plat["total_rev"] / plat["users"]
-    plat["Payer share"] = plat["payers"] / plat["users"]
     print(plat.sort_values("total_rev", ascending=False))
 
     # Plot Revenue per platform
@@ -165,16 +244,19 @@ def platform_country_performance(df: pd.DataFrame) -> None:
     plt.close()
 
     print("\n=== Country Performance (top 10 by revenue) ===")
-    country = (
-        df.groupby("country").agg(
-            users = ("user_id", "nunique"),
-            total_rev = ("total_revenue", "sum")        
+    arpu_top = (
+        lf.drop_nulls("country").group_by("country").agg(
+            users = pl.col("user_id").n_unique(),
+            total_rev = pl.col("total_revenue").sum()
         )
+        .with_columns(arpu = pl.col("total_rev") / pl.col("users"))
+        .sort("total_rev", descending=True)
+        .head(10)
+        .collect()
+        .to_pandas()
+        .set_index("country")
     )
 
-    country["arpu"] = country["total_rev"] / country["users"]
-    arpu_top = country.sort_values("total_rev", ascending=False).head(10)
-
     if arpu_top.empty:
          print("No country data available.")
     else:
@@ -193,7 +275,7 @@ def platform_country_performance(df: pd.DataFrame) -> None:
     plt.savefig("plots/task_2_arpu_countries.png")
     plt.close()
 
-def engagement_vs_monetization(df: pd.DataFrame) -> None:
+def engagement_vs_monetization(lf: pl.LazyFrame) -> None:
         """
         How does engagement relate to revenue?
         
@@ -205,34 +287,37 @@ def engagement_vs_monetization(df: pd.DataFrame) -> None:
 
         # Aggregate per user
         agg_user = (
-            df.groupby("user_id").agg(
-                platform = ("platform", "first"),
-                country = ("country", "first"),
-                total_sessions = ("total_session_count", "sum"),
-                total_duration = ("total_session_duration", "sum"),
-                total_rev = ("total_revenue", "sum"),
+            lf.drop_nulls("user_id").group_by("user_id").agg(
+                total_sessions = pl.col("total_session_count").sum(),
+                total_duration = pl.col("total_session_duration").sum(),
+                total_rev = pl.col("total_revenue").sum(),
             )
         )
 
-        # Define session groups
-        groups = [0, 1, 3, 10, 30, 100, np.inf]
+        # Define session groups: (0, 1], (1, 3], ... (100, inf); users with 0 sessions are left out
+        breaks = [1, 3, 10, 30, 100]
         labels = ["1", "2-3", "4-10", "11-30", "31-100", "100+"]
-        agg_user["session_group"] = pd.cut(
-            agg_user["total_sessions"], 
-            bins = groups, 
-            labels = labels, 
-            right = True
+        agg_user = (
+            agg_user
+            .filter(pl.col("total_sessions") > 0)
+            .with_columns(
+                session_group = pl.col("total_sessions").cut(breaks, labels=labels).cast(pl.Enum(labels)),
+                is_payer = pl.col("total_rev") > 0
+            )
         )
 
         group = (
-            agg_user.groupby("session_group", observed=True).agg(
-                users = ("total_rev", "size"),
-                payers = ("total_rev", lambda x: (x > 0).sum()),
-                avg_rev = ("total_rev", "mean")
+            agg_user.group_by("session_group").agg(
+                users = pl.len(),
+                payers = pl.col("is_payer").sum(),
+                avg_rev = pl.col("total_rev").mean()
             )
+            .with_columns(payer_share = pl.col("payers") / pl.col("users"))
+            .sort("session_group")
+            .collect()
+            .to_pandas()
+            .set_index("session_group")
         )
-
-        group["payer_share"] = group["payers"] / group["users"]
         print(group)
 
         # Average revenue by group
@@ -247,7 +332,7 @@ def engagement_vs_monetization(df: pd.DataFrame) -> None:
         plt.savefig("plots/task_2_rev_by_group.png")
         plt.close()
 
-def frustration_signals(df: pd.DataFrame) -> None:
+def frustration_signals(lf: pl.LazyFrame) -> None:
         """
         Exploring the potential frustration by looking at:
         - server_connection_error occurences
@@ -255,30 +340,44 @@ def frustration_signals(df: pd.DataFrame) -> None:
         """
 
         print("\n === Frustration Signals ===")
-        df["has_error"] = df["server_connection_error"] > 0
+        # One pass over the rows; platform and country tables are marginals of this small table
+        # (nulls are kept here and dropped per marginal, so a missing country doesn't hide a platform row)
+        combined = (
+            lf.group_by("platform", "country", "event_date").agg(
+                user_days = pl.len(),
+                error_days = pl.col("has_error").sum()
+            )
+            .collect()
+            .lazy()
+        )
 
         # Error rate by platform
         error_platform = (
-            df.groupby("platform").agg(
-                days = ("event_date", "nunique"),
-                user_days = ("user_id", "size"),
-                error_days = ("has_error", "sum") 
+            combined.drop_nulls("platform").group_by("platform").agg(
+                days = pl.col("event_date").n_unique(),
+                user_days = pl.col("user_days").sum(),
+                error_days = pl.col("error_days").sum()
             )
+            .with_columns(error_rate = pl.col("error_days") / pl.col("user_days"))
+            .collect()
+            .to_pandas()
+            .set_index("platform")
         )
-
-        error_platform["error_rate"] = error_platform["error_days"] / error_platform["user_days"]
         print("\nServer Connection error rate by platform:")
         print(error_platform.sort_values("error_rate", ascending=False))
 
         # Top 10 countries by error rate
         error_country = (
-            df.groupby("country").agg(
-                user_days = ("user_id", "size"),
-                error_days = ("has_error", "sum")
+            combined.drop_nulls("country").group_by("country").agg(
+                user_days = pl.col("user_days").sum(),
+                error_days = pl.col("error_days").sum()
             )
+            .with_columns(error_rate = pl.col("error_days") / pl.col("user_days"))
+            .filter(pl.col("user_days") > 5000) # avoid tiny countries below 5000
+            .collect()
+            .to_pandas()
+            .set_index("country")
         )
-        error_country["error_rate"] = error_country["error_days"] / error_country["user_days"]
-        error_country = error_country[error_country["user_days"] > 5000] # avoid tiny countries below 5000
         
         print("\nCountries with highest error rates:")
         print(error_country.sort_values("error_rate", ascending=False).head(10))
@@ -299,14 +398,12 @@ def frustration_signals(df: pd.DataFrame) -> None:
         plt.close()
 
         # Win Rate Distribution
-        vals = df["win_rate"].dropna()
+        vals = lf.select(pl.col("win_rate").drop_nulls()).collect().to_series().to_numpy()
         
         fig, ax = plt.subplots()
-        ax = vals.plot(
-             kind = "hist",
-             bins = 30,
-             title = "Distribution of per-day win rate"
-        )
+        ax.hist(vals, bins = 30)
+        ax.set_title("Distribution of per-day win rate")
+        ax.set_ylabel("Frequency")
 
         mean_wr = vals.mean()
         ax.text(
@@ -324,23 +421,40 @@ def frustration_signals(df: pd.DataFrame) -> None:
         plt.savefig("plots/task_2_win_rate.png")
         plt.close()
 
-def cohort_retention(df: pd.DataFrame, max_age: int = 7) -> pd.DataFrame:
+def cohort_retention(lf: pl.LazyFrame, max_age: int = 7) -> pd.DataFrame:
     print("\n=== Cohort retention (up to D{}) ===".format(max_age))
 
     # Cohort size per install_date
-    cohort_size = df.groupby("install_date")["user_id"].nunique()
-
-    # for each age, check active users
-    ret = {}
-    for age in range(1, max_age + 1):
-        mask = df["days_since_install"] == age
-        active = (
-            df[mask].groupby("install_date")["user_id"].nunique()
+    cohort_size = lf.drop_nulls("install_date").group_by("install_date").agg(cohort_size = pl.col("user_id").n_unique())
+
+    # Active users per (cohort, age) in a single pass, as a share of the cohort
+    rates = (
+        lf.filter(pl.col("days_since_install").is_between(1, max_age))
+        .drop_nulls("install_date")
+        .group_by("install_date", "days_since_install")
+        .agg(active = pl.col("user_id").n_unique())
+        .join(cohort_size, on="install_date")
+        .with_columns(rate = pl.col("active") / pl.col("cohort_size"))
+    )
+    cohorts, rates = pl.collect_all([cohort_size.sort("install_date"), rates])
+
+    active = rates.pivot(
+        on = "days_since_install",
+        index = "install_date",
+        values = "rate"
+    )
+
+    # Missing (cohort, age) pairs stay NaN, e.g. cohorts too young to reach that age
+    retention_table = (
+        active.to_pandas()
+        .set_index("install_date")
+        .reindex(
+            index = cohorts["install_date"].to_pandas(),
+            columns = [str(age) for age in range(1, max_age + 1)]
         )
-        rate = (active / cohort_size).rename(f"D{age}")
-        ret[f"D{age}"] = rate
+    )
+    retention_table.columns = [f"D{age}" for age in range(1, max_age + 1)]
 
-    retention_table = pd.concat(ret.values(), axis=1)
     print(retention_table.describe())
     return retention_table
 
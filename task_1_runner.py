@@ -13,21 +13,23 @@ Simulating:
 
 import os
 import numpy as np
+import matplotlib
+matplotlib.use("Agg") # file output only, no interactive backend
 import matplotlib.pyplot as plt
 
 plt.style.use("Solarize_Light2")
 
 from src.ab_test_task_1 import (
     VariantConfig,
-    simulate_dau,
-    combine_sources,
-    simulate_revenue
+    ScenarioConfig,
+    run_scenarios,
+    DEFAULT_ARPPU
 )
 
 from src.retention import (
-    linear_retention,
-    retention_new_variant_a,
-    retention_new_variant_b
+    retention_table,
+    make_retention_new_variant_a,
+    make_retention_new_variant_b
 )
 
 # Define retention for ORIGINAL source - day 1 = install day. D1 Retention = Age 2 and so on so on
@@ -47,12 +49,6 @@ retention_points_b = {
     15: 0.09 # D14 = 9%
 }
 
-def retention_a_original(day: int) -> float:
-    return linear_retention(day, retention_points_a)
-
-def retention_b_original(day:int) -> float:
-    return linear_retention(day, retention_points_b)
-
 # 2. Defining variants A and B
 variant_a = VariantConfig(
     name="A",
@@ -88,10 +84,31 @@ def main():
     day_axis = np.arange(1, days + 1)
     base_installs = [20000] * days # 20k installs/day for both variants
 
-    # Original source
+    # Retention per age for the original source, built once and reused by every scenario
+    retention_a_original = retention_table(retention_points_a, days)
+    retention_b_original = retention_table(retention_points_b, days)
+    retention_a_new = make_retention_new_variant_a(days)
+    retention_b_new = make_retention_new_variant_b(days)
+
+    # New user source after Day 20
+    installs_old = [20000] * 19 + [12000] * 11
+    installs_new = [0] * 19 + [8000] * 11
 
-    dau_a_old = simulate_dau(base_installs, retention_a_original)
-    dau_b_old = simulate_dau(base_installs, retention_b_original)
+    # Independent simulations (small enough to run serially)
+    scenarios = [
+        # Original source
+        ScenarioConfig("A - original", variant_a, [base_installs], [retention_a_original]),
+        ScenarioConfig("B - original", variant_b, [base_installs], [retention_b_original]),
+        # DAU from old and new sources for A and B variants
+        ScenarioConfig("A - with new source", variant_a, [installs_old, installs_new], [retention_a_original, retention_a_new]),
+        ScenarioConfig("B - with new source", variant_b, [installs_old, installs_new], [retention_b_original, retention_b_new]),
+    ]
+    (
+        (dau_a_old, rev_a_base),
+        (dau_b_old, rev_b_base),
+        (dau_a_total, rev_a_newsource),
+        (dau_b_total, rev_b_newsource),
+    ) = run_scenarios(scenarios)
 
     # DAU on day 15
     dau15_a = dau_a_old[14]
@@ -101,70 +118,33 @@ def main():
     print("-> Winner (DAU after 15 days):", "A" if dau15_a > dau15_b else "B")
 
     # Revenue without 10-day sale 
-    rev_a_base = simulate_revenue(variant_a, base_installs, dau_a_old)
-    rev_b_base = simulate_revenue(variant_b, base_installs, dau_b_old)
-
-    rev15_a = sum(rev_a_base[:15])
-    rev15_b = sum(rev_b_base[:15])
+    rev15_a = rev_a_base[:15].sum()
+    rev15_b = rev_b_base[:15].sum()
     print_totals("(b) Total revenue by Day 15", rev15_a, rev15_b)
 
-    rev30_a = sum(rev_a_base[:30])
-    rev30_b = sum(rev_b_base[:30])
+    rev30_a = rev_a_base[:30].sum()
+    rev30_b = rev_b_base[:30].sum()
     print_totals("(c) Total revenue by Day 30", rev30_a, rev30_b)
 
     # 10-day sale results
     sale_period = (15, 24)
     sale_boost = 0.01 # +1 percentage point
 
-    rev_a_sale = simulate_revenue(
-        variant_a,
-        daily_installs_total=base_installs,
-        dau_total=dau_a_old,
-        sale_period=sale_period,
-        sale_boost_abs=sale_boost,
-    )
+    # Revenue is linear in purchase rate, so the sale only adds installs * boost * ARPPU inside the window
+    sale_mask = np.zeros(days)
+    sale_mask[sale_period[0] - 1:sale_period[1]] = 1.0
+    sale_uplift = np.asarray(base_installs, dtype=np.float64) * sale_boost * DEFAULT_ARPPU * sale_mask
 
-    rev_b_sale = simulate_revenue(
-        variant_b,
-        daily_installs_total=base_installs,
-        dau_total=dau_b_old,
-        sale_period=sale_period,
-        sale_boost_abs=sale_boost,
-    )
+    rev_a_sale = rev_a_base + sale_uplift
+    rev_b_sale = rev_b_base + sale_uplift
 
-    rev30_a_sale = sum(rev_a_sale[:30])
-    rev30_b_sale = sum(rev_b_sale[:30])
+    rev30_a_sale = rev_a_sale[:30].sum()
+    rev30_b_sale = rev_b_sale[:30].sum()
     print_totals("(d) Total revenue by Day 30 with 10-day sale", rev30_a_sale, rev30_b_sale)
 
-    # New user source after Day 20
-    installs_old = [20000] * 19 + [12000] * 11
-    installs_new = [0] * 19 + [8000] * 11
-    totals_installs = [o + n for o, n in zip(installs_old, installs_new)]
-
-    # DAU from old and new sources for A and B variants
-    dau_a_old_mix = simulate_dau(installs_old, retention_a_original)
-    dau_a_new_mix = simulate_dau(installs_new, retention_new_variant_a)
-    dau_a_total = combine_sources(dau_a_old_mix, dau_a_new_mix)
-
-    dau_b_old_mix = simulate_dau(installs_old, retention_b_original)
-    dau_b_new_mix = simulate_dau(installs_new, retention_new_variant_b)
-    dau_b_total = combine_sources(dau_b_old_mix, dau_b_new_mix)
-
-    # Revenue with the total
-    rev_a_newsource = simulate_revenue(
-        variant_a,
-        daily_installs_total=totals_installs,
-        dau_total=dau_a_total
-    )
-
-    rev_b_newsource = simulate_revenue(
-        variant_b,
-        daily_installs_total=totals_installs,
-        dau_total=dau_b_total,
-    )
-
-    rev30_a_new = sum(rev_a_newsource[:30])
-    rev30_b_new = sum(rev_b_newsource[:30])
+    # Revenue with the new user source
+    rev30_a_new = rev_a_newsource[:30].sum()
+    rev30_b_new = rev_b_newsource[:30].sum()
     print_totals("(e) Total revenue by Day 30 with new user source", rev30_a_new, rev30_b_new)
 
 
@@ -187,25 +167,19 @@ def main():
         print("\n-> (f) Overall, the temporary sale creates more value than the new user source.")
 
     # PLOTS
-    cum_rev_a_base = np.cumsum(rev_a_base)
-    cum_rev_b_base = np.cumsum(rev_b_base)
-    
-    cum_rev_a_sale = np.cumsum(rev_a_sale)
-    cum_rev_b_sale = np.cumsum(rev_b_sale)
-
-
-    cum_rev_a_new = np.cumsum(rev_a_newsource)
-    cum_rev_b_new = np.cumsum(rev_b_newsource)
+    # Cumulative revenue is written into one preallocated buffer, refilled before each plot that needs it
+    cum_buf = np.empty((3, days))
 
+    # One figure reused for every plot, cleared between them
+    fig, ax = plt.subplots(figsize=(7, 5))
 
     # Plot 1: DAU over time
-    fig, ax = plt.subplots(figsize=(7, 5))
     ax.plot(day_axis, dau_a_old, label="Variant A", linewidth=2)
     ax.plot(day_axis, dau_b_old, label="Variant B", linewidth=2)
 
     # Highlight Day 15
     ax.axvline(15, color="gray", linestyle="--", linewidth=1)
-    ax.text(15.1, max(dau_a_old + dau_b_old) * 0.2, "(Day 15)", fontsize=9, color="gray")
+    ax.text(15.1, max(dau_a_old.max(), dau_b_old.max()) * 0.2, "(Day 15)", fontsize=9, color="gray")
     ax.set_title("Task 1 - DAU over time\nVariant B retains slightly more users", fontsize=12)
     ax.set_xlabel("Day")
     ax.set_ylabel("DAU")
@@ -213,10 +187,12 @@ def main():
     ax.grid(alpha=0.3)
     fig.tight_layout()
     fig.savefig("plots/task_1_dau_story.png")
-    plt.close(fig)
 
     # Plot 2: Cumulative revenue A vs B (original user source)
-    fig, ax = plt.subplots(figsize=(7, 5))
+    cum_rev_a_base = np.cumsum(rev_a_base, out=cum_buf[0])
+    cum_rev_b_base = np.cumsum(rev_b_base, out=cum_buf[1])
+
+    ax.clear()
     ax.plot(day_axis, cum_rev_a_base, label="Variant A", linewidth=2)
     ax.plot(day_axis, cum_rev_b_base, label="Variant B", linewidth=2)
 
@@ -241,10 +217,13 @@ def main():
     ax.grid(alpha=0.3)
     fig.tight_layout()
     fig.savefig("plots/task_1_cumulative_revenue_original.png")
-    plt.close(fig)
 
     # Plot 3: Variant A (original user source vs sale vs new source)
-    fig, ax = plt.subplots(figsize=(7, 5))
+    cum_rev_a_base = np.cumsum(rev_a_base, out=cum_buf[0])
+    cum_rev_a_sale = np.cumsum(rev_a_sale, out=cum_buf[1])
+    cum_rev_a_new = np.cumsum(rev_a_newsource, out=cum_buf[2])
+
+    ax.clear()
     ax.plot(day_axis, cum_rev_a_base, label="A - original", linewidth=2.4, linestyle="--", color="red")
     ax.plot(day_axis, cum_rev_a_sale, label="A - with sale", linewidth=2, color="blue")
     ax.plot(day_axis, cum_rev_a_new, label="A - with new source", linewidth=2, color="green")
@@ -263,10 +242,13 @@ def main():
     ax.grid(alpha=0.3)
     fig.tight_layout()
     fig.savefig("plots/task_1_cumrevenue_A_scenerios.png")
-    plt.close(fig)
 
     # Plot 4: Variant B (original user source vs sale vs new source)
-    fig, ax = plt.subplots(figsize=(7, 5))
+    cum_rev_b_base = np.cumsum(rev_b_base, out=cum_buf[0])
+    cum_rev_b_sale = np.cumsum(rev_b_sale, out=cum_buf[1])
+    cum_rev_b_new = np.cumsum(rev_b_newsource, out=cum_buf[2])
+
+    ax.clear()
     ax.plot(day_axis, cum_rev_b_base, label="B – original", linewidth=2.4, linestyle="--", color="red")
     ax.plot(day_axis, cum_rev_b_sale, label="B – with sale", linewidth=2, color="blue")
     ax.plot(day_axis, cum_rev_b_new, label="B – with new source", linewidth=2, color="green")
@@ -1,6 +1,10 @@
 # Task 2 runner
 
+import matplotlib
+matplotlib.use("Agg") # file output only, must be set before pyplot is imported
+
 from src.task_2_analysis import (
+    analysis_columns,
     load_all_data,
     preprocess,
     overview,
@@ -12,8 +16,8 @@ from src.task_2_analysis import (
 )
 
 def main():
-    df_raw = load_all_data(sample_frac=0.2)
-    df = preprocess(df_raw)
+    # Materialize the preprocessed frame once; every analysis plans lazily over it
+    df = preprocess(load_all_data(sample_frac=0.2, columns=analysis_columns)).collect().lazy()
 
     overview(df)
     platform_country_performance(df)